@@ -0,0 +1,188 @@
+"""
+Admission control and backpressure for the scoring endpoints.
+
+Requests are split into two priority lanes:
+- interactive: reviewers using Input.html (the default)
+- bulk: feed clients, identified by `X-Traffic-Class: bulk` or listed in BULK_CLIENTS
+
+Clients are identified by something the server controls: an API key issued through
+ADMISSION_API_KEYS (sent as `X-Api-Key`), otherwise the remote address. Unknown keys are
+ignored, so rotating a header cannot mint fresh buckets; reviewers sharing a NAT address
+share one bucket unless they are issued keys.
+
+Each client gets a token bucket per lane (429 + Retry-After when empty). Scoring work is
+capped globally and per lane; bulk can never take the slots reserved for interactive
+traffic and yields whenever an interactive request is waiting. Requests that cannot
+start wait in a bounded queue for a short time and are rejected with 503 + Retry-After
+when the queue is full or the wait times out.
+"""
+import functools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import jsonify, request
+
+# --- CONFIGURATION ---
+MAX_IN_FLIGHT = 8             # Scoring requests (inference + DB connection) running at once
+MAX_TRACKED_CLIENTS = 10_000  # Token buckets kept in memory (least recently used are evicted)
+API_KEY_HEADER = "X-Api-Key"
+TRAFFIC_CLASS_HEADER = "X-Traffic-Class"
+
+
+def _env_list(name):
+    return [item.strip() for item in os.environ.get(name, "").split(",") if item.strip()]
+
+
+# ADMISSION_API_KEYS="key1=datafeed,key2=claims-office"  (issued key -> client name)
+API_KEYS = dict(item.split("=", 1) for item in _env_list("ADMISSION_API_KEYS") if "=" in item)
+# ADMISSION_BULK_CLIENTS="datafeed,10.0.0.7"  (client names or addresses always routed to bulk)
+BULK_CLIENTS = set(_env_list("ADMISSION_BULK_CLIENTS"))
+
+LANES = {
+    # max_in_flight: lane cap within MAX_IN_FLIGHT; max_queue: waiting requests before 503
+    # rate/burst: per-client token bucket (requests per second / bucket size)
+    "interactive": {"max_in_flight": MAX_IN_FLIGHT, "max_queue": 32, "queue_timeout": 2.0, "rate": 5.0, "burst": 10},
+    "bulk": {"max_in_flight": MAX_IN_FLIGHT // 2, "max_queue": 16, "queue_timeout": 10.0, "rate": 50.0, "burst": 100},
+}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now):
+        """Consumes one token; returns 0 on success or the seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Thread-safe lane scheduler guarding the scoring endpoints."""
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, lanes=LANES, api_keys=API_KEYS, bulk_clients=BULK_CLIENTS):
+        self.max_in_flight = max_in_flight
+        self.lanes = lanes
+        self.api_keys = api_keys
+        self.bulk_clients = bulk_clients
+        self._cond = threading.Condition()
+        self._buckets = OrderedDict()
+        self._in_flight = {lane: 0 for lane in lanes}
+        self._queued = {lane: 0 for lane in lanes}
+        self._stats = {lane: {"admitted": 0, "rejected_rate_limit": 0, "rejected_queue_full": 0,
+                              "rejected_queue_timeout": 0} for lane in lanes}
+
+    def _bucket(self, lane, client, now):
+        key = (lane, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.lanes[lane]["rate"], self.lanes[lane]["burst"], now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _can_start(self, lane):
+        if sum(self._in_flight.values()) >= self.max_in_flight:
+            return False
+        if self._in_flight[lane] >= self.lanes[lane]["max_in_flight"]:
+            return False
+        # Bulk work yields to any interactive request that is already waiting
+        return lane == "interactive" or self._queued["interactive"] == 0
+
+    def acquire(self, lane, client):
+        """
+        Admits one request. Returns (None, 0) when it may run, otherwise
+        (http_status, retry_after_seconds). Every admitted request must call release().
+        """
+        config = self.lanes[lane]
+        stats = self._stats[lane]
+        with self._cond:
+            now = time.monotonic()
+            wait = self._bucket(lane, client, now).take(now)
+            if wait > 0:
+                stats["rejected_rate_limit"] += 1
+                return 429, max(1, math.ceil(wait))
+
+            if not self._can_start(lane):
+                if self._queued[lane] >= config["max_queue"]:
+                    stats["rejected_queue_full"] += 1
+                    return 503, max(1, math.ceil(config["queue_timeout"]))
+
+                self._queued[lane] += 1
+                deadline = now + config["queue_timeout"]
+                try:
+                    while not self._can_start(lane):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            stats["rejected_queue_timeout"] += 1
+                            return 503, max(1, math.ceil(config["queue_timeout"]))
+                        self._cond.wait(remaining)
+                finally:
+                    self._queued[lane] -= 1
+                    # A departing interactive waiter may unblock bulk waiters
+                    self._cond.notify_all()
+
+            self._in_flight[lane] += 1
+            stats["admitted"] += 1
+            return None, 0
+
+    def release(self, lane):
+        with self._cond:
+            self._in_flight[lane] -= 1
+            self._cond.notify_all()
+
+    def metrics(self):
+        """Queue depth, in-flight work and rejection counters per lane."""
+        with self._cond:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": sum(self._in_flight.values()),
+                "tracked_clients": len(self._buckets),
+                "lanes": {
+                    lane: {
+                        "in_flight": self._in_flight[lane],
+                        "queued": self._queued[lane],
+                        "max_in_flight": self.lanes[lane]["max_in_flight"],
+                        "max_queue": self.lanes[lane]["max_queue"],
+                        **self._stats[lane],
+                    }
+                    for lane in self.lanes
+                },
+            }
+
+    # --- Flask integration ---
+    def classify(self, req):
+        """Returns (lane, client_id) for a Flask request: the issued key's client name, else the remote address."""
+        client = self.api_keys.get(req.headers.get(API_KEY_HEADER, "")) or req.remote_addr or "unknown"
+        is_bulk = req.headers.get(TRAFFIC_CLASS_HEADER, "").lower() == "bulk" or client in self.bulk_clients
+        return ("bulk" if is_bulk else "interactive"), client
+
+    def guard(self, view):
+        """Route decorator: admits the request or answers 429/503 with Retry-After."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            lane, client = self.classify(request)
+            status, retry_after = self.acquire(lane, client)
+            if status:
+                reason = "Rate limit exceeded" if status == 429 else "Scoring queue is full"
+                response = jsonify({"error": reason, "lane": lane, "retry_after": retry_after})
+                response.status_code = status
+                response.headers["Retry-After"] = str(retry_after)
+                return response
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self.release(lane)
+        return wrapper
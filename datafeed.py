@@ -2,6 +2,7 @@ import pandas as pd
 import psycopg2
 import json
 import numpy as np
+from aggregate_store import claim_deltas, ensure_schema, persist_deltas
 
 # --- CONFIGURATION ---
 EXCEL_FILE_PATH = 'test_data.xlsx' 
@@ -81,6 +82,11 @@ def import_data():
             if (index + 1) % 1000 == 0:  # progress update every 1000 rows
                 print(f"  -> Imported {index + 1}/{len(df)} rows...")
 
+        # Keep the Provider/AttendingPhysician/BeneID aggregates in step with the new rows
+        ensure_schema(cur)
+        persist_deltas(cur, claim_deltas(df.to_dict('records')))
+        print("✅ Aggregate feature store updated.")
+
         conn.commit()
         print("\n✅✅ Import complete! All data has been successfully saved to the database.")
 
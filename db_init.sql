@@ -16,3 +16,22 @@ CREATE TABLE IF NOT EXISTS claims (
   model_output JSON DEFAULT NULL,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- Per-entity aggregates maintained on every claim insert (see aggregate_store.py):
+-- training-time baseline counts plus exponentially decayed live counts/sums
+CREATE TABLE IF NOT EXISTS claim_aggregates (
+  entity VARCHAR(32) NOT NULL,
+  entity_key VARCHAR(128) NOT NULL,
+  baseline_count BIGINT NOT NULL DEFAULT 0,
+  claim_count DOUBLE PRECISION NOT NULL DEFAULT 0,
+  reimbursed_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+  decayed_at DOUBLE PRECISION NOT NULL DEFAULT EXTRACT(EPOCH FROM CURRENT_TIMESTAMP),
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (entity, entity_key)
+);
+
+CREATE TABLE IF NOT EXISTS claim_aggregates_meta (
+  name VARCHAR(64) PRIMARY KEY,
+  value TEXT,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
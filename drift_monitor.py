@@ -0,0 +1,205 @@
+"""
+Streaming score-distribution and feature-drift monitor.
+
+A baseline snapshot (bin edges + training proportions for every encoded feature and for
+the fraud probability) is built once from training data. At serving time each scored
+claim is binned against those fixed edges into the histogram of the current time window,
+so memory is `max_windows x columns x bins` integers no matter how many claims are seen.
+PSI and a binned two-sample KS statistic are computed against the baseline on demand.
+
+Usage:
+    python drift_monitor.py baseline training_claims.parquet [--out drift_baseline.json]
+"""
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+from feature_encoding import MODEL_FEATURE_COLUMNS, encode_frame, load_frequency_maps
+
+# --- CONFIGURATION ---
+DRIFT_BASELINE_PATH = "drift_baseline.json"
+PROBABILITY_COLUMN = "fraud_probability"
+DEFAULT_BINS = 10
+DEFAULT_SAMPLE_ROWS = 200_000
+WINDOW_SECONDS = 3600
+MAX_WINDOWS = 24
+
+# Conventional PSI thresholds
+PSI_WARNING = 0.1
+PSI_DRIFT = 0.25
+EPSILON = 1e-4
+
+
+# --- METRICS ---
+def psi(expected, actual):
+    """Population Stability Index between two proportion vectors."""
+    expected = np.clip(expected, EPSILON, None)
+    actual = np.clip(actual, EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(expected, actual):
+    """Two-sample KS statistic evaluated on the shared bins (max CDF gap)."""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+def drift_status(psi_value):
+    return "drift" if psi_value >= PSI_DRIFT else "warning" if psi_value >= PSI_WARNING else "stable"
+
+
+# --- BASELINE ---
+def build_baseline(features, probabilities, n_bins=DEFAULT_BINS):
+    """Builds a baseline snapshot from an encoded feature matrix and fraud probabilities."""
+    data = np.column_stack([np.asarray(features, dtype=np.float64), np.asarray(probabilities, dtype=np.float64)])
+    names = MODEL_FEATURE_COLUMNS + [PROBABILITY_COLUMN]
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    columns = []
+    for j, name in enumerate(names):
+        edges = np.unique(np.quantile(data[:, j], quantiles))
+        counts = np.bincount(np.searchsorted(edges, data[:, j], side='right'), minlength=len(edges) + 1)
+        columns.append({
+            "name": name,
+            "edges": edges.tolist(),
+            "proportions": (counts / max(len(data), 1)).tolist(),
+        })
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "n_rows": int(len(data)),
+        "columns": columns,
+    }
+
+
+class DriftMonitor:
+    """Fixed-memory, windowed histograms of encoded features and fraud probability."""
+
+    def __init__(self, baseline, window_seconds=WINDOW_SECONDS, max_windows=MAX_WINDOWS):
+        self.baseline = baseline
+        self.names = [c["name"] for c in baseline["columns"]]
+        self.edges = [np.asarray(c["edges"], dtype=np.float64) for c in baseline["columns"]]
+        self.n_bins = [len(e) + 1 for e in self.edges]
+        self.width = max(self.n_bins)
+        self.expected = [np.asarray(c["proportions"], dtype=np.float64) for c in baseline["columns"]]
+        self.window_seconds = window_seconds
+        self.max_windows = max_windows
+        self._offsets = np.arange(len(self.names)) * self.width
+        self._windows = deque(maxlen=max_windows)  # (window_start, counts[n_columns, width])
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path=DRIFT_BASELINE_PATH, **kwargs):
+        with open(path, 'r') as f:
+            return cls(json.load(f), **kwargs)
+
+    def _window_start(self, now):
+        return int(now // self.window_seconds) * self.window_seconds
+
+    def _current_counts(self, now):
+        window_start = self._window_start(now)
+        if not self._windows or self._windows[-1][0] != window_start:
+            self._windows.append((window_start, np.zeros((len(self.names), self.width), dtype=np.int64)))
+        return self._windows[-1][1]
+
+    def update(self, features, probabilities, now=None):
+        """Adds a batch of encoded feature rows and their fraud probabilities (vectorized)."""
+        data = np.column_stack([
+            np.asarray(features, dtype=np.float64).reshape(len(probabilities), -1),
+            np.asarray(probabilities, dtype=np.float64),
+        ])
+        bins = np.empty(data.shape, dtype=np.int64)
+        for j, edges in enumerate(self.edges):
+            bins[:, j] = np.searchsorted(edges, data[:, j], side='right')
+        flat = np.bincount((bins + self._offsets).ravel(), minlength=len(self.names) * self.width)
+        with self._lock:
+            counts = self._current_counts(time.time() if now is None else now)
+            counts += flat.reshape(len(self.names), self.width)
+
+    def observe(self, feature_vector, probability):
+        """Single-claim update used on the interactive scoring path."""
+        self.update([feature_vector], [probability])
+
+    def report(self, last_n_windows=None, now=None):
+        """
+        PSI/KS per column over the last `last_n_windows` windows of wall-clock time (all
+        `max_windows` by default). Windows are only created when claims arrive, so they are
+        filtered by start time; a quiet period shows up as fewer observations, not old data.
+        """
+        span = min(last_n_windows or self.max_windows, self.max_windows)
+        cutoff = self._window_start(time.time() if now is None else now) - (span - 1) * self.window_seconds
+        with self._lock:
+            windows = [(start, c) for start, c in self._windows if start >= cutoff]
+            counts = sum((c for _, c in windows), np.zeros((len(self.names), self.width), dtype=np.int64))
+
+        observed = int(counts[-1].sum()) if len(self.names) else 0
+        columns = []
+        for j, name in enumerate(self.names):
+            actual_counts = counts[j, :self.n_bins[j]]
+            total = actual_counts.sum()
+            if total == 0:
+                columns.append({"name": name, "psi": None, "ks": None, "status": "no data"})
+                continue
+            actual = actual_counts / total
+            psi_value = psi(self.expected[j], actual)
+            columns.append({
+                "name": name,
+                "psi": round(psi_value, 4),
+                "ks": round(binned_ks(self.expected[j], actual), 4),
+                "status": drift_status(psi_value),
+            })
+        return {
+            "baseline_created_at": self.baseline.get("created_at"),
+            "window_seconds": self.window_seconds,
+            "windows": [
+                {"start": datetime.fromtimestamp(start, timezone.utc).isoformat(), "observed": int(c[-1].sum())}
+                for start, c in windows
+            ],
+            "observed": observed,
+            "columns": columns,
+        }
+
+
+# --- BASELINE CLI ---
+def build_baseline_from_file(input_path, n_bins=DEFAULT_BINS, sample_rows=DEFAULT_SAMPLE_ROWS, seed=0):
+    """Streams a training file, keeps a uniform reservoir sample of scored rows and bins it."""
+    # Imported here so the Flask app does not need pyarrow just to run the monitor
+    from model_wrapper import ModelWrapper
+    from score_file import FREQUENCY_MAPS_PATH, MODEL_PATH, iter_batches
+
+    model = ModelWrapper(model_path=MODEL_PATH)
+    frequency_maps = load_frequency_maps(FREQUENCY_MAPS_PATH)
+    rng = np.random.default_rng(seed)
+
+    # Reservoir by random priority: keep the sample_rows rows with the highest random keys
+    kept_keys = np.empty(0)
+    kept_rows = np.empty((0, len(MODEL_FEATURE_COLUMNS) + 1))
+    for df in iter_batches(input_path, sample_rows):
+        features = encode_frame(df, frequency_maps)
+        probabilities = model.predict_batch(features)[:, 1]
+        kept_keys = np.concatenate([kept_keys, rng.random(len(df))])
+        kept_rows = np.vstack([kept_rows, np.column_stack([features, probabilities])])
+        if len(kept_keys) > sample_rows:
+            top = np.argpartition(kept_keys, -sample_rows)[-sample_rows:]
+            kept_keys, kept_rows = kept_keys[top], kept_rows[top]
+
+    return build_baseline(kept_rows[:, :-1], kept_rows[:, -1], n_bins=n_bins)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the drift-monitor baseline from training data.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    baseline_parser = sub.add_parser("baseline", help="Build a baseline snapshot from a training file")
+    baseline_parser.add_argument("input", help="Training claims file (.csv, .xlsx, .parquet)")
+    baseline_parser.add_argument("--out", default=DRIFT_BASELINE_PATH)
+    baseline_parser.add_argument("--bins", type=int, default=DEFAULT_BINS)
+    baseline_parser.add_argument("--sample-rows", type=int, default=DEFAULT_SAMPLE_ROWS)
+    args = parser.parse_args()
+
+    print(f"🔄 Building drift baseline from '{args.input}'...")
+    snapshot = build_baseline_from_file(args.input, n_bins=args.bins, sample_rows=args.sample_rows)
+    with open(args.out, 'w') as f:
+        json.dump(snapshot, f)
+    print(f"✅ Baseline over {snapshot['n_rows']} rows written to '{args.out}'.")
@@ -0,0 +1,192 @@
+import json
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+FREQUENCY_MAPS_PATH = 'frequency_maps.txt'
+DEFAULT_FREQUENCY = 1  # Value used for categories never seen during training
+
+GENDER_MAP = {'Male': 1, 'Female': 2}
+RACE_MAP = {'White': 1, 'Black': 2, 'Other': 3, 'Asian': 4, 'Hispanic': 5}
+
+HIGH_RISK_THRESHOLD = 75
+MEDIUM_RISK_THRESHOLD = 40
+
+# --- SINGLE SOURCE OF TRUTH FOR THE FEATURE VECTOR ---
+# (model feature name, encoding, accepted input keys). The first key is the one the
+# Flask form sends; the others are the raw column names found in claim extracts.
+# NOTE: State and County are frequency-encoded here, as app3 always did, while app4 has
+# always fed their raw codes. The training pipeline is not in this repo, so app4 keeps
+# its own behaviour (see RAW_CODE_FEATURES there) until one of the two is confirmed.
+FEATURE_SPEC = [
+    ('InscClaimAmtReimbursed', 'num', ['InscClaimAmtReimbursed']),
+    ('DeductibleAmtPaid', 'num', ['DeductibleAmtPaid']),
+    ('Gender', 'gender', ['Gender']),
+    ('Race', 'race', ['Race']),
+    ('RenalDiseaseIndicator', 'renal', ['RenalDiseaseIndicator']),
+    ('State', 'freq', ['State']),
+    ('County', 'freq', ['County']),
+    ('NoOfMonths_PartACov', 'num', ['NoOfMonth_PartACov', 'NoOfMonths_PartACov']),
+    ('NoOfMonths_PartBCov', 'num', ['NoOfMonth_PartBCov', 'NoOfMonths_PartBCov']),
+    ('ChronicCond_Alzheimer', 'num', ['ChronicCond_Alzheimer']),
+    ('ChronicCond_Heartfailure', 'num', ['ChronicCond_Heartfailure']),
+    ('ChronicCond_KidneyDisease', 'num', ['ChronicCond_KidneyDisease']),
+    ('ChronicCond_Cancer', 'num', ['ChronicCond_Cancer']),
+    ('ChronicCond_ObstrPulmonary', 'num', ['ChronicCond_ObstrPulmonary']),
+    ('ChronicCond_Depression', 'num', ['ChronicCond_Depression']),
+    ('ChronicCond_Diabetes', 'num', ['ChronicCond_Diabetes']),
+    ('ChronicCond_IschemicHeart', 'num', ['ChronicCond_IschemicHeart']),
+    ('ChronicCond_Osteoporasis', 'num', ['ChronicCond_Osteoporosis', 'ChronicCond_Osteoporasis']),
+    ('ChronicCond_rheumatoidarthritis', 'num', ['ChronicCond_rheumatoidarthritis']),
+    ('ChronicCond_stroke', 'num', ['ChronicCond_stroke']),
+    ('IPAnnualReimbursementAmt', 'num', ['IPAnnualReimbursementAmt']),
+    ('IPAnnualDeductibleAmt', 'num', ['IPAnnualDeductibleAmt']),
+    ('OPAnnualReimbursementAmt', 'num', ['OPAnnualReimbursementAmt']),
+    ('OPAnnualDeductibleAmt', 'num', ['OPAnnualDeductibleAmt']),
+    ('BeneID_freq_encoded', 'freq', ['BeneID']),
+    ('Provider_freq_encoded', 'freq', ['provider_id', 'Provider']),
+    ('AttendingPhysician_freq_encoded', 'freq', ['AttendingPhysician']),
+    ('OperatingPhysician_freq_encoded', 'freq', ['OperatingPhysician']),
+    ('OtherPhysician_freq_encoded', 'freq', ['OtherPhysician']),
+    ('DiagnosisGroupCode_freq_encoded', 'freq', ['DiagnosisGroupCode']),
+]
+
+MODEL_FEATURE_COLUMNS = [name for name, _, _ in FEATURE_SPEC]
+
+# Accepted input keys per feature, plus their lowercase forms (Postgres column names and
+# the Streamlit form use lowercase keys)
+FEATURE_KEYS = [keys + [k.lower() for k in keys if k.lower() not in keys] for _, _, keys in FEATURE_SPEC]
+
+
+def load_frequency_maps(path=FREQUENCY_MAPS_PATH):
+    """Loads the frequency encoding maps produced at training time."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def freq_map_key(feature_name):
+    """Returns the frequency map name for a '*_freq_encoded' (or State/County) feature."""
+    return feature_name.replace('_freq_encoded', '')
+
+
+def risk_label(risk_score):
+    """Maps a 0-100 risk score to its human-readable label."""
+    return "High Risk" if risk_score > HIGH_RISK_THRESHOLD else "Medium Risk" if risk_score > MEDIUM_RISK_THRESHOLD else "Low Risk"
+
+
+def risk_labels(risk_scores):
+    """Vectorized risk_label for an array of scores."""
+    return np.select(
+        [risk_scores > HIGH_RISK_THRESHOLD, risk_scores > MEDIUM_RISK_THRESHOLD],
+        ["High Risk", "Medium Risk"],
+        default="Low Risk",
+    )
+
+
+# --- SINGLE CLAIM ENCODING ---
+def _to_float(v):
+    return float(v) if v is not None and v != '' else 0.0
+
+
+def _encode_category(mapping, v):
+    if v in mapping:
+        return float(mapping[v])
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def freq_key(v):
+    """Frequency-map key for a raw value. Integral floats (e.g. a nullable integer column
+    loaded as float64) drop their '.0' so they match the keys written at training time."""
+    if v is None or v is pd.NA or (isinstance(v, float) and np.isnan(v)):
+        return 'None'
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def is_missing(v):
+    """True for None, NaN/NA and empty strings."""
+    return v is None or v is pd.NA or v == '' or (isinstance(v, float) and np.isnan(v))
+
+
+def first_present(claim_data, keys):
+    """
+    Value of the first key that holds a real value. The claims table has columns from
+    both insert paths (e.g. provider_id and provider), so a NULL alias must not hide the
+    value stored under the other one.
+    """
+    for key in keys:
+        value = claim_data.get(key)
+        if not is_missing(value):
+            return value
+    return None
+
+
+def encode_claim(claim_data, frequency_maps, aggregates=None):
+    """
+    Builds the model feature vector (in MODEL_FEATURE_COLUMNS order) for one claim dict.
+    When an AggregateStore is given, the entities it tracks use live counts instead of
+    the static training-time frequency maps.
+    """
+    feature_vector = []
+    for (name, kind, _), keys in zip(FEATURE_SPEC, FEATURE_KEYS):
+        value = first_present(claim_data, keys)
+        if kind == 'freq':
+            entity = freq_map_key(name)
+            if aggregates is not None and aggregates.tracks(entity):
+                feature_vector.append(aggregates.frequency(entity, freq_key(value)))
+            else:
+                feature_vector.append(frequency_maps.get(entity, {}).get(freq_key(value), DEFAULT_FREQUENCY))
+        elif kind == 'gender':
+            feature_vector.append(_encode_category(GENDER_MAP, value))
+        elif kind == 'race':
+            feature_vector.append(_encode_category(RACE_MAP, value))
+        elif kind == 'renal':
+            # Same rule as encode_frame: 'Y' -> 1, numbers as-is, anything else ('N', '') -> 0
+            feature_vector.append(_encode_category({'Y': 1}, value))
+        else:
+            feature_vector.append(_to_float(value))
+    return feature_vector
+
+
+# --- BATCH ENCODING ---
+def _first_column(df, keys):
+    """Column-wise first_present: the first alias column, with its gaps filled from the others."""
+    columns = [df[key] for key in keys if key in df.columns]
+    if not columns:
+        return None
+    col = columns[0]
+    for other in columns[1:]:
+        col = col.where(col.notna() & (col != ''), other)
+    return col
+
+
+def encode_frame(df, frequency_maps, aggregates=None):
+    """Vectorized encode_claim: returns an (n_rows, n_features) float matrix for a DataFrame of claims."""
+    matrix = np.zeros((len(df), len(FEATURE_SPEC)), dtype=np.float64)
+    for i, ((name, kind, _), keys) in enumerate(zip(FEATURE_SPEC, FEATURE_KEYS)):
+        col = _first_column(df, keys)
+        if col is None:
+            if kind == 'freq':
+                matrix[:, i] = DEFAULT_FREQUENCY
+            continue
+        if kind == 'freq':
+            entity = freq_map_key(name)
+            keys_as_str = col.map(freq_key)
+            if aggregates is not None and aggregates.tracks(entity):
+                matrix[:, i] = aggregates.frequencies(entity, keys_as_str)
+                continue
+            encoded = keys_as_str.map(frequency_maps.get(entity, {}))
+            matrix[:, i] = pd.to_numeric(encoded, errors='coerce').fillna(DEFAULT_FREQUENCY).to_numpy()
+        elif kind in ('gender', 'race'):
+            mapping = GENDER_MAP if kind == 'gender' else RACE_MAP
+            mapped = pd.to_numeric(col.map(mapping), errors='coerce')
+            matrix[:, i] = mapped.fillna(pd.to_numeric(col, errors='coerce')).fillna(0.0).to_numpy()
+        elif kind == 'renal':
+            matrix[:, i] = pd.to_numeric(col.replace({'Y': 1}), errors='coerce').fillna(0.0).to_numpy()
+        else:
+            matrix[:, i] = pd.to_numeric(col, errors='coerce').fillna(0.0).to_numpy()
+    return matrix
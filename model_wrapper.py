@@ -84,3 +84,21 @@ class ModelWrapper:
             logging.error("❌ Prediction failed: %s", str(e))
             return {"error": str(e)}
 
+    def predict_batch(self, input_matrix: np.ndarray) -> np.ndarray:
+        """
+        Scores a 2-D feature matrix (one row per claim) in a single call and returns
+        the class probabilities, shape (n_rows, n_classes). Unlike predict(), errors
+        are raised so that batch jobs fail loudly instead of writing partial output.
+        """
+        try:
+            processed_data = np.asarray(input_matrix, dtype=np.float64)
+
+            if self.scaler:
+                processed_data = self.scaler.transform(processed_data)
+
+            probabilities = self.model.predict_proba(processed_data)
+            logging.info("✅ Batch prediction successful for %d rows.", len(processed_data))
+            return probabilities
+        except Exception as e:
+            logging.error("❌ Batch prediction failed: %s", str(e))
+            raise e
@@ -0,0 +1,247 @@
+"""
+Memory and CPU profiling hooks for long-running worker processes.
+
+Everything here uses the standard library only and stays idle until asked:
+- a tracemalloc snapshot diff over N seconds (what grew, and where it was allocated)
+- a sampling CPU profile over N seconds (a background thread samples every thread's stack)
+- per-request allocation counters on the scoring routes (only when PROFILING_ENABLED)
+
+Captures run in a background thread, one at a time, and write a plain-text report of the
+top allocators / hottest functions to PROFILE_REPORT_DIR. With PROFILING_ENABLED=1 they can be
+triggered through the admin endpoints in app3 (callers must send PROFILING_TOKEN; without a
+token only localhost is allowed) or, on Unix, by sending SIGUSR1 (memory) / SIGUSR2 (CPU) to
+the worker process.
+"""
+import functools
+import hmac
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from datetime import datetime
+
+# --- CONFIGURATION ---
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+LOOPBACK_ADDRESSES = {"127.0.0.1", "::1"}  # Only callers allowed when no PROFILING_TOKEN is set
+PROFILE_REPORT_DIR = "profiles"
+TRACEMALLOC_FRAMES = 10
+CPU_SAMPLE_INTERVAL = 0.005   # Seconds between stack samples
+MAX_CAPTURE_SECONDS = 600
+SIGNAL_CAPTURE_SECONDS = 60
+TOP_N = 25
+
+# Python-level functions a thread sits in while blocked (server loop, sockets, locks);
+# samples whose innermost frame is one of these are idle time, not CPU
+IDLE_FUNCTIONS = {"wait", "select", "poll", "accept", "readinto", "_wait_for_tstate_lock"}
+
+
+def _function_key(frame):
+    code = frame.f_code
+    return f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+
+
+class Profiler:
+    """On-demand tracemalloc diffs, sampling CPU profiles and per-request allocation counts."""
+
+    def __init__(self, enabled=PROFILING_ENABLED, token=PROFILING_TOKEN, report_dir=PROFILE_REPORT_DIR):
+        self.enabled = enabled
+        self.token = token
+        self.report_dir = report_dir
+        self.current_capture = None
+        self.reports = deque(maxlen=20)
+        self._capture_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._request_stats = {}
+        if enabled and not token:
+            logging.warning("⚠️ Profiling is enabled without PROFILING_TOKEN; "
+                            "the admin profiling endpoints will only answer requests from localhost.")
+
+    # --- access control ---
+    def authorized(self, req):
+        """
+        Admin endpoints answer only when profiling is enabled, and then only to callers
+        sending the token, or to loopback callers when no token is configured.
+        """
+        if not self.enabled:
+            return False
+        if self.token:
+            return hmac.compare_digest(req.headers.get(ADMIN_TOKEN_HEADER, ""), self.token)
+        return req.remote_addr in LOOPBACK_ADDRESSES
+
+    # --- captures ---
+    def start_capture(self, kind, seconds):
+        """Starts a 'memory' or 'cpu' capture in the background; returns the report path, or None if busy."""
+        if kind not in ("memory", "cpu"):
+            raise ValueError(f"Unknown capture kind '{kind}'")
+        seconds = max(1, min(int(seconds), MAX_CAPTURE_SECONDS))
+        # Prepare everything that can fail before taking the lock, so a failure cannot leave it held
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, f"{kind}-{os.getpid()}-{datetime.now():%Y%m%d-%H%M%S}.txt")
+        if not self._capture_lock.acquire(blocking=False):
+            return None
+        try:
+            self.current_capture = {"kind": kind, "seconds": seconds, "report": path, "started_at": datetime.now().isoformat()}
+            threading.Thread(target=self._run_capture, args=(kind, seconds, path), name=f"profiler-{kind}", daemon=True).start()
+        except Exception:
+            self.current_capture = None
+            self._capture_lock.release()
+            raise
+        return path
+
+    def _run_capture(self, kind, seconds, path):
+        try:
+            lines = self._memory_diff(seconds) if kind == "memory" else self._cpu_profile(seconds)
+            lines += ["", "Per-request allocations (net blocks; bytes only while tracemalloc is tracing):"]
+            if not self.enabled:
+                lines.append("  (per-request tracking is off; start the process with PROFILING_ENABLED=1)")
+            else:
+                lines += [f"  {name}: {stats}" for name, stats in self.request_stats().items()] or ["  (none recorded)"]
+            with open(path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            self.reports.append(path)
+            logging.info("✅ %s profile written to %s", kind, path)
+        except Exception as e:
+            logging.error("❌ %s profile capture failed: %s", kind, str(e))
+        finally:
+            self.current_capture = None
+            self._capture_lock.release()
+
+    def _memory_diff(self, seconds):
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            before = tracemalloc.take_snapshot()
+            time.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+        before, after = before.filter_traces(filters), after.filter_traces(filters)
+        growth = after.compare_to(before, "lineno")
+
+        lines = [
+            f"tracemalloc snapshot diff over {seconds}s (pid {os.getpid()}, {datetime.now().isoformat()})",
+            f"Allocated blocks now: {sys.getallocatedblocks()}",
+            "",
+            f"Top {TOP_N} allocation growth by line:",
+        ]
+        lines += [f"  {stat}" for stat in growth[:TOP_N]]
+        # tracemalloc only sees allocations made while it traces, so when this capture started
+        # it the "live" view is limited to what was allocated during the window
+        if started_here:
+            lines += ["", f"Top {TOP_N} allocators by line, allocated during the window and still alive at its end:"]
+        else:
+            lines += ["", f"Top {TOP_N} live allocators by line (end of window, traced since tracemalloc was started):"]
+        lines += [f"  {stat}" for stat in after.statistics("lineno")[:TOP_N]]
+        lines += ["", "Tracebacks of the 3 largest growth sites:"]
+        for stat in after.compare_to(before, "traceback")[:3]:
+            lines.append(f"  {stat.size_diff / 1024:.1f} KiB in {stat.count_diff:+d} blocks")
+            lines += [f"    {line}" for line in stat.traceback.format()]
+        return lines
+
+    def _cpu_profile(self, seconds):
+        own_thread = threading.get_ident()
+        self_samples, cumulative_samples = Counter(), Counter()
+        samples = idle = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if frame.f_code.co_name in IDLE_FUNCTIONS:
+                    idle += 1
+                    continue
+                samples += 1
+                self_samples[_function_key(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    key = _function_key(frame)
+                    if key not in seen:
+                        cumulative_samples[key] += 1
+                        seen.add(key)
+                    frame = frame.f_back
+            time.sleep(CPU_SAMPLE_INTERVAL)
+
+        lines = [
+            f"Sampling CPU profile over {seconds}s (pid {os.getpid()}, {datetime.now().isoformat()})",
+            f"Busy samples: {samples}, idle samples skipped: {idle}, interval: {CPU_SAMPLE_INTERVAL * 1000:.0f}ms",
+            "",
+            f"Top {TOP_N} functions by self samples:",
+        ]
+        lines += [f"  {count / max(samples, 1):6.1%}  {count:6d}  {key}" for key, count in self_samples.most_common(TOP_N)]
+        lines += ["", f"Top {TOP_N} functions by cumulative samples:"]
+        lines += [f"  {count / max(samples, 1):6.1%}  {count:6d}  {key}" for key, count in cumulative_samples.most_common(TOP_N)]
+        return lines
+
+    # --- per-request allocation counts ---
+    def track_allocations(self, view):
+        """
+        Route decorator recording the net change in allocated blocks (and traced bytes
+        while tracemalloc runs) per request. Counts are process-wide, so concurrent
+        requests blur them; they are meant for spotting trends, not exact attribution.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return view(*args, **kwargs)
+            tracing = tracemalloc.is_tracing()
+            blocks_before = sys.getallocatedblocks()
+            bytes_before = tracemalloc.get_traced_memory()[0] if tracing else 0
+            try:
+                return view(*args, **kwargs)
+            finally:
+                blocks = sys.getallocatedblocks() - blocks_before
+                traced = tracemalloc.get_traced_memory()[0] - bytes_before if tracing and tracemalloc.is_tracing() else None
+                self._record(view.__name__, blocks, traced)
+        return wrapper
+
+    def _record(self, name, blocks, traced):
+        with self._stats_lock:
+            stats = self._request_stats.setdefault(
+                name, {"requests": 0, "net_blocks_total": 0, "net_blocks_max": 0, "net_bytes_total": 0})
+            stats["requests"] += 1
+            stats["net_blocks_total"] += blocks
+            stats["net_blocks_max"] = max(stats["net_blocks_max"], blocks)
+            if traced is not None:
+                stats["net_bytes_total"] += traced
+
+    def request_stats(self):
+        with self._stats_lock:
+            return {
+                name: {**stats, "net_blocks_mean": round(stats["net_blocks_total"] / stats["requests"], 1)}
+                for name, stats in self._request_stats.items()
+            }
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "current_capture": self.current_capture,
+            "reports": list(self.reports),
+            "request_allocations": self.request_stats(),
+        }
+
+    # --- signals ---
+    def install_signal_handlers(self, seconds=SIGNAL_CAPTURE_SECONDS):
+        """
+        SIGUSR1 -> memory diff, SIGUSR2 -> CPU profile. No-op where unsupported (e.g. Windows).
+        Callers install these only when profiling is enabled.
+        """
+        for name, kind in (("SIGUSR1", "memory"), ("SIGUSR2", "cpu")):
+            signum = getattr(signal, name, None)
+            if signum is None:
+                continue
+            try:
+                signal.signal(signum, lambda _signum, _frame, kind=kind: self.start_capture(kind, seconds))
+            except ValueError:
+                # signal.signal only works from the main thread (e.g. not under some WSGI servers)
+                logging.info("Profiling signal handlers not installed: not running in the main thread.")
+                return
@@ -0,0 +1,204 @@
+"""
+Offline scoring CLI: scores a CSV, Excel or Parquet claims extract without a database.
+
+The file is streamed in record batches, each batch is frequency-encoded and scored by
+the XGBoost model in a worker process, and results are appended to a Parquet file.
+At most `--workers * 2` batches are in flight, so memory stays bounded by the batch
+size regardless of the size of the input file.
+
+Usage:
+    python score_file.py claims.xlsx scored.parquet --batch-size 50000 --workers 4
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from feature_encoding import encode_frame, load_frequency_maps, risk_labels
+from model_wrapper import ModelWrapper
+
+# --- CONFIGURATION ---
+MODEL_PATH = "xgboost_final_model.json"
+FREQUENCY_MAPS_PATH = "frequency_maps.txt"
+DEFAULT_BATCH_SIZE = 50_000
+DEFAULT_ID_COLUMNS = "ClaimID,BeneID,Provider"
+
+# Per-process state, populated once by _init_worker
+_worker_model = None
+_worker_maps = None
+
+
+# --- INPUT READERS (each yields DataFrames of at most batch_size rows) ---
+def _iter_csv(path, batch_size):
+    # Read everything as text so frequency map keys match exactly what is in the file
+    yield from pd.read_csv(path, chunksize=batch_size, dtype=str, keep_default_na=True)
+
+
+def _iter_parquet(path, batch_size):
+    parquet_file = pq.ParquetFile(path)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield record_batch.to_pandas()
+
+
+def _iter_excel(path, batch_size):
+    # openpyxl's read-only mode streams rows instead of loading the whole sheet
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h) for h in next(rows)]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+READERS = {
+    ".csv": _iter_csv,
+    ".parquet": _iter_parquet,
+    ".pq": _iter_parquet,
+    ".xlsx": _iter_excel,
+    ".xlsm": _iter_excel,
+}
+
+
+def iter_batches(path, batch_size):
+    """Picks a streaming reader from the file extension."""
+    if batch_size < 1:
+        raise ValueError(f"Batch size must be at least 1 (got {batch_size})")
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in READERS:
+        raise ValueError(f"Unsupported input format '{ext}'. Expected one of: {', '.join(sorted(READERS))}")
+    return READERS[ext](path, batch_size)
+
+
+# --- SCORING ---
+def output_schema(id_columns):
+    """Fixed Parquet schema so every batch appends to the same file."""
+    fields = [pa.field(col, pa.string()) for col in id_columns]
+    fields += [
+        pa.field("risk_score", pa.int32()),
+        pa.field("risk_label", pa.string()),
+        pa.field("prediction", pa.int8()),
+        pa.field("probability_not_fraud", pa.float64()),
+        pa.field("probability_fraud", pa.float64()),
+    ]
+    return pa.schema(fields)
+
+
+def _init_worker(model_path, maps_path):
+    global _worker_model, _worker_maps
+    _worker_model = ModelWrapper(model_path=model_path)
+    # Parallelism comes from the worker processes; one XGBoost thread each avoids cores^2 threads
+    _worker_model.model.set_params(n_jobs=1)
+    _worker_maps = load_frequency_maps(maps_path)
+
+
+def _as_text(series):
+    return series.astype(object).where(series.notna(), None).map(lambda v: v if v is None else str(v))
+
+
+def score_batch(df, id_columns):
+    """Encodes and scores one batch; runs inside a worker process."""
+    features = encode_frame(df, _worker_maps)
+    probabilities = _worker_model.predict_batch(features)
+    probability_fraud = probabilities[:, 1] if probabilities.shape[1] > 1 else np.zeros(len(df))
+    risk_scores = (probability_fraud * 100).astype(np.int32)
+
+    out = pd.DataFrame({col: _as_text(df[col]) if col in df.columns else None for col in id_columns},
+                       index=df.index)
+    out["risk_score"] = risk_scores
+    out["risk_label"] = risk_labels(risk_scores)
+    out["prediction"] = (probability_fraud >= 0.5).astype(np.int8)
+    out["probability_not_fraud"] = probabilities[:, 0]
+    out["probability_fraud"] = probability_fraud
+    return out
+
+
+def score_file(input_path, output_path, batch_size=DEFAULT_BATCH_SIZE, workers=None,
+               id_columns=None, model_path=MODEL_PATH, maps_path=FREQUENCY_MAPS_PATH):
+    """
+    Streams input_path through the model and writes scored rows to output_path (Parquet).
+    Rows go to a temporary file that replaces output_path only once every batch has been
+    scored, so a failed run never leaves a truncated file behind.
+    """
+    workers = workers or os.cpu_count() or 1
+    id_columns = id_columns if id_columns is not None else DEFAULT_ID_COLUMNS.split(",")
+    schema = output_schema(id_columns)
+    max_in_flight = workers * 2
+    batches = iter_batches(input_path, batch_size)
+    tmp_path = output_path + ".tmp"
+
+    total_rows = 0
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_path, maps_path)) as pool, \
+                pq.ParquetWriter(tmp_path, schema) as writer:
+            pending = deque()
+
+            def drain_one():
+                nonlocal total_rows
+                scored = pending.popleft().result()
+                writer.write_table(pa.Table.from_pandas(scored, schema=schema, preserve_index=False))
+                total_rows += len(scored)
+                print(f"  -> Scored {total_rows} rows...")
+
+            # Results are written in submission order, so output rows keep the input order
+            for df in batches:
+                pending.append(pool.submit(score_batch, df, id_columns))
+                if len(pending) >= max_in_flight:
+                    drain_one()
+            while pending:
+                drain_one()
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, output_path)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Scored {total_rows} rows in {elapsed:.1f}s -> '{output_path}'")
+    return total_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a claims file (CSV, Excel or Parquet) offline into Parquet.")
+    parser.add_argument("input", help="Path to the claims file (.csv, .xlsx, .parquet)")
+    parser.add_argument("output", help="Path of the scored Parquet file to write")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per record batch")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--id-columns", default=DEFAULT_ID_COLUMNS,
+                        help="Comma-separated input columns copied to the output (default: %(default)s)")
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the XGBoost model")
+    parser.add_argument("--frequency-maps", default=FREQUENCY_MAPS_PATH, help="Path to the frequency maps")
+    args = parser.parse_args()
+
+    id_columns = [c.strip() for c in args.id_columns.split(",") if c.strip()]
+    try:
+        print(f"🔄 Scoring '{args.input}'...")
+        score_file(args.input, args.output, batch_size=args.batch_size, workers=args.workers,
+                   id_columns=id_columns, model_path=args.model, maps_path=args.frequency_maps)
+    except FileNotFoundError as e:
+        print(f"❌ ERROR: File not found. Details: {e}")
+        raise SystemExit(1)
+    except Exception as e:
+        print(f"❌ ERROR: Scoring failed. Details: {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()